@@ -1,10 +1,13 @@
 import pandas as pd
+import numpy as np
+from src.etl.paysim_converter import PAYSIM_CSV_PATH, PAYSIM_DTYPES
+from src.utils import top_n
 
 def explore_paysim_data():
     print("Analyzing PaySim dataset for risk scoring...")
     
     # Load sample from actual file
-    sample_df = pd.read_csv('data/raw/paysim_transactions.csv', nrows=50000)
+    sample_df = pd.read_csv(PAYSIM_CSV_PATH, nrows=50000, dtype=PAYSIM_DTYPES)
     
     print("=== PAYSIM DATASET ANALYSIS ===")
     print(f"Sample shape: {sample_df.shape}")
@@ -64,25 +67,29 @@ def generate_customer_risk_features(df):
     """Generate risk features per customer for scoring"""
     print("\nGenerating customer risk features...")
     
-    # Group by customer
-    customer_features = df.groupby('nameOrig').agg({
-        'amount': ['count', 'sum', 'mean', 'max'],
-        'isFraud': 'sum',
-        'type': lambda x: (x == 'CASH_OUT').sum()  # Count of cash-out transactions
-    }).round(2)
+    # Cash-out indicator so every aggregation runs on a built-in reducer
+    df = df.assign(is_cash_out=(df['type'] == 'CASH_OUT').astype(np.int8))
     
-    # Flatten column names
-    customer_features.columns = ['tx_count', 'total_amount', 'avg_amount', 'max_amount', 'fraud_count', 'cash_out_count']
+    # Group by customer
+    customer_features = df.groupby('nameOrig', sort=False, observed=True).agg(
+        tx_count=('amount', 'count'),
+        total_amount=('amount', 'sum'),
+        avg_amount=('amount', 'mean'),
+        max_amount=('amount', 'max'),
+        fraud_count=('isFraud', 'sum'),
+        cash_out_count=('is_cash_out', 'sum')  # Count of cash-out transactions
+    )
     
     # Calculate risk score components
-    customer_features['fraud_rate'] = (customer_features['fraud_count'] / customer_features['tx_count']).round(4)
-    customer_features['cash_out_rate'] = (customer_features['cash_out_count'] / customer_features['tx_count']).round(4)
+    customer_features['fraud_rate'] = customer_features['fraud_count'] / customer_features['tx_count']
+    customer_features['cash_out_rate'] = customer_features['cash_out_count'] / customer_features['tx_count']
     customer_features['high_amount_rate'] = (customer_features['max_amount'] > 100000).astype(int)
     
     print(f"\n=== CUSTOMER RISK FEATURES ===")
     print(f"Customers analyzed: {len(customer_features):,}")
     print("\nTop 10 highest risk customers:")
-    print(customer_features.nlargest(10, 'fraud_count')[['tx_count', 'fraud_count', 'fraud_rate', 'cash_out_rate']])
+    # Round for display only; features keep full precision
+    print(top_n(customer_features, 'fraud_count')[['tx_count', 'fraud_count', 'fraud_rate', 'cash_out_rate']].round(4))
     
     return customer_features
 
@@ -3,9 +3,14 @@ import os
 from dotenv import load_dotenv
 
 class Config:
+    # Parsed settings shared by every instance (loaded once per process)
+    _settings = None
+    
     def __init__(self):
-        load_dotenv()
-        self.settings = self._load_yaml()
+        if Config._settings is None:
+            load_dotenv()
+            Config._settings = self._load_yaml()
+        self.settings = Config._settings
     
     def _load_yaml(self):
         with open('src/config/settings.yaml', 'r') as file:
@@ -1,19 +1,34 @@
 import logging
 import os
-from datetime import datetime
+from logging.handlers import TimedRotatingFileHandler
+
+LOG_FILE = 'logs/risk_scoring.log'
 
 def setup_logging():
     # Create logs directory if it doesn't exist
     os.makedirs('logs', exist_ok=True)
     
-    # Configure logging
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.FileHandler(f'logs/risk_scoring_{datetime.now().strftime("%Y%m%d")}.log'),
-            logging.StreamHandler()
-        ]
+    root = logging.getLogger()
+    log_path = os.path.abspath(LOG_FILE)
+    
+    # Configure logging once per process (repeated calls reuse the handlers)
+    already_configured = any(
+        isinstance(handler, TimedRotatingFileHandler) and handler.baseFilename == log_path
+        for handler in root.handlers
     )
     
-    return logging.getLogger(__name__)
\ No newline at end of file
+    if not already_configured:
+        formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+        
+        # Rotates at midnight; the file is only opened on the first record
+        file_handler = TimedRotatingFileHandler(log_path, when='midnight', backupCount=14, delay=True)
+        file_handler.setFormatter(formatter)
+        
+        stream_handler = logging.StreamHandler()
+        stream_handler.setFormatter(formatter)
+        
+        root.addHandler(file_handler)
+        root.addHandler(stream_handler)
+        root.setLevel(logging.INFO)
+    
+    return logging.getLogger(__name__)
@@ -1,4 +1,5 @@
 # ETL package
-from .data_explorer import explore_paysim_data
+from .data_explorer import explore_paysim_data, generate_full_customer_risk_features
+from .paysim_converter import convert_paysim_to_parquet, load_paysim_transactions
 
-__all__ = ['explore_paysim_data']
\ No newline at end of file
+__all__ = ['explore_paysim_data', 'generate_full_customer_risk_features', 'convert_paysim_to_parquet', 'load_paysim_transactions']
\ No newline at end of file
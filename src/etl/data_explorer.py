@@ -1,8 +1,17 @@
 import pandas as pd
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from src.config import Config, setup_logging
+from src.etl.paysim_converter import PAYSIM_PARQUET_PATH, ensure_paysim_parquet, load_paysim_transactions
+from src.utils import top_n
+
+# Columns used by the exploration and customer feature steps
+ANALYSIS_COLUMNS = ['type', 'amount', 'isFraud', 'nameOrig', 'newbalanceOrig']
 
 def explore_paysim_data():
     logger = setup_logging()
@@ -10,8 +19,8 @@ def explore_paysim_data():
     
     logger.info("Analyzing PaySim dataset for risk scoring...")
     
-    # Load sample from actual file
-    sample_df = pd.read_csv('data/raw/paysim_transactions.csv', nrows=50000)
+    # Load sample from the columnar copy (only the columns analysed below)
+    sample_df = load_paysim_transactions(columns=ANALYSIS_COLUMNS, nrows=50000)
     
     print("=== PAYSIM DATASET ANALYSIS ===")
     print(f"Sample shape: {sample_df.shape}")
@@ -73,28 +82,75 @@ def generate_customer_risk_features(df):
     logger = setup_logging()
     logger.info("Generating customer risk features...")
     
+    # Cash-out indicator so every aggregation runs on a built-in reducer
+    df = df.assign(is_cash_out=(df['type'] == 'CASH_OUT').astype(np.int8))
+    
     # Group by customer
-    customer_features = df.groupby('nameOrig').agg({
-        'amount': ['count', 'sum', 'mean', 'max'],
-        'isFraud': 'sum',
-        'type': lambda x: (x == 'CASH_OUT').sum()  # Count of cash-out transactions
-    }).round(2)
-    
-    # Flatten column names
-    customer_features.columns = ['tx_count', 'total_amount', 'avg_amount', 'max_amount', 'fraud_count', 'cash_out_count']
-    
-    # Calculate risk score components
-    customer_features['fraud_rate'] = (customer_features['fraud_count'] / customer_features['tx_count']).round(4)
-    customer_features['cash_out_rate'] = (customer_features['cash_out_count'] / customer_features['tx_count']).round(4)
-    customer_features['high_amount_rate'] = (customer_features['max_amount'] > 100000).astype(int)
+    customer_features = df.groupby('nameOrig', sort=False, observed=True).agg(
+        tx_count=('amount', 'count'),
+        total_amount=('amount', 'sum'),
+        avg_amount=('amount', 'mean'),
+        max_amount=('amount', 'max'),
+        fraud_count=('isFraud', 'sum'),
+        cash_out_count=('is_cash_out', 'sum')  # Count of cash-out transactions
+    ).astype({'fraud_count': np.int64, 'cash_out_count': np.int64})  # Small-int sums keep int8 only while they fit
+    
+    customer_features = _add_risk_rates(customer_features)
     
     print(f"\n=== CUSTOMER RISK FEATURES ===")
     print(f"Customers analyzed: {len(customer_features):,}")
     print("\nTop 10 highest risk customers:")
-    print(customer_features.nlargest(10, 'fraud_count')[['tx_count', 'fraud_count', 'fraud_rate', 'cash_out_rate']])
+    # Round for display only; features keep full precision
+    print(top_n(customer_features, 'fraud_count')[['tx_count', 'fraud_count', 'fraud_rate', 'cash_out_rate']].round(4))
     
     return customer_features
 
+def generate_full_customer_risk_features(parquet_path=PAYSIM_PARQUET_PATH):
+    """Generate risk features for every customer in the full PaySim Parquet file"""
+    logger = setup_logging()
+    logger.info("Generating customer risk features for full dataset...")
+    
+    # Columnar read of only the aggregated columns
+    table = pq.read_table(ensure_paysim_parquet(parquet_path), columns=['nameOrig', 'type', 'amount', 'isFraud'])
+    table = table.unify_dictionaries()
+    is_cash_out = pc.equal(table['type'].cast(pa.string()), 'CASH_OUT')
+    table = table.append_column('is_cash_out', is_cash_out.cast(pa.int8()))
+    
+    # Multithreaded Arrow hash aggregation, grouped on dictionary codes
+    grouped = table.group_by('nameOrig').aggregate([
+        ('amount', 'count'),
+        ('amount', 'sum'),
+        ('amount', 'mean'),
+        ('amount', 'max'),
+        ('isFraud', 'sum'),
+        ('is_cash_out', 'sum')
+    ])
+    
+    customer_features = grouped.to_pandas().set_index('nameOrig').rename(columns={
+        'amount_count': 'tx_count',
+        'amount_sum': 'total_amount',
+        'amount_mean': 'avg_amount',
+        'amount_max': 'max_amount',
+        'isFraud_sum': 'fraud_count',
+        'is_cash_out_sum': 'cash_out_count'
+    })[['tx_count', 'total_amount', 'avg_amount', 'max_amount', 'fraud_count', 'cash_out_count']]
+    
+    # Arrow widens amount sums and means; cast back to the pandas groupby dtype (counts stay int64)
+    amount_dtype = table.schema.field('amount').type.to_pandas_dtype()
+    customer_features = customer_features.astype({'total_amount': amount_dtype, 'avg_amount': amount_dtype})
+    
+    logger.info(f"Customer risk features generated for {len(customer_features):,} customers")
+    return _add_risk_rates(customer_features)
+
+def _add_risk_rates(customer_features):
+    """Calculate risk score components from aggregated customer features"""
+    customer_features['fraud_rate'] = customer_features['fraud_count'] / customer_features['tx_count']
+    customer_features['cash_out_rate'] = customer_features['cash_out_count'] / customer_features['tx_count']
+    customer_features['high_amount_rate'] = (customer_features['max_amount'] > 100000).astype(int)
+    return customer_features
+
 if __name__ == "__main__":
     sample_data = explore_paysim_data()
-    customer_features = generate_customer_risk_features(sample_data)
\ No newline at end of file
+    customer_features = generate_customer_risk_features(sample_data)
+    full_customer_features = generate_full_customer_risk_features()
+    print(f"\nFull dataset customers analyzed: {len(full_customer_features):,}")
\ No newline at end of file
@@ -0,0 +1,55 @@
+import os
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+PAYSIM_CSV_PATH = 'data/raw/paysim_transactions.csv'
+PAYSIM_PARQUET_PATH = 'data/raw/paysim.parquet'
+
+# Explicit PaySim column dtypes (skips inference, keeps enum-like columns compact)
+PAYSIM_DTYPES = {
+    'type': 'category',
+    'amount': 'float32',
+    'isFraud': 'int8',
+    'newbalanceOrig': 'float32',
+    'nameOrig': 'category'
+}
+
+def convert_paysim_to_parquet(csv_path=PAYSIM_CSV_PATH, parquet_path=PAYSIM_PARQUET_PATH):
+    """One-time conversion of the raw PaySim CSV to columnar Parquet"""
+    print(f"Converting {csv_path} to Parquet...")
+
+    df = pd.read_csv(csv_path, dtype=PAYSIM_DTYPES)
+
+    # Categorical columns are written dictionary-encoded
+    df.to_parquet(parquet_path, compression='zstd', row_group_size=500_000, index=False)
+
+    print(f"PaySim transactions saved to: {parquet_path}")
+    return parquet_path
+
+def ensure_paysim_parquet(parquet_path=PAYSIM_PARQUET_PATH):
+    """Return the PaySim Parquet path, converting the CSV on first use"""
+    if not os.path.exists(parquet_path):
+        convert_paysim_to_parquet(parquet_path=parquet_path)
+    return parquet_path
+
+def load_paysim_transactions(columns=None, nrows=None):
+    """Load PaySim transactions from Parquet, converting the CSV on first use"""
+    ensure_paysim_parquet()
+
+    if nrows is None:
+        return pd.read_parquet(PAYSIM_PARQUET_PATH, columns=columns)
+
+    # Only decode the leading row groups needed for the sample
+    batches = []
+    rows_read = 0
+    for batch in pq.ParquetFile(PAYSIM_PARQUET_PATH).iter_batches(columns=columns):
+        batches.append(batch)
+        rows_read += batch.num_rows
+        if rows_read >= nrows:
+            break
+
+    return pa.Table.from_batches(batches).slice(0, nrows).to_pandas()
+
+if __name__ == "__main__":
+    convert_paysim_to_parquet()
@@ -3,13 +3,45 @@ import numpy as np
 import random
 from datetime import datetime, timedelta
 
+# Enhanced risk category labels and their lower score bounds (LOW has none)
+RISK_CATEGORY_LABELS = np.array(['LOW', 'MEDIUM', 'HIGH', 'CRITICAL'])
+RISK_CATEGORY_EDGES = np.array([30, 60, 85])
+
+# Geographic risk flag bits (one uint8 per country)
+FLAG_HIGH_RISK_JURISDICTION = 0b001
+FLAG_SANCTIONS = 0b010
+FLAG_FATF = 0b100
+
+def _fused_risk_scores(transaction_risk, country_risk, pep_risk, age_risk, kyc_incomplete,
+                       new_account, high_risk_jurisdiction, sanctions_risk, fatf_risk, weights):
+    """
+    Compute demographic, geographic and enhanced risk scores in one pass
+    Works on raw NumPy arrays and accumulates the weighted sum in place
+    """
+    demographic = age_risk + kyc_incomplete * 30 + new_account * 20
+    geographic = high_risk_jurisdiction * 40 + sanctions_risk * 60 + fatf_risk * 80
+    
+    score = transaction_risk * weights['transaction_risk']
+    score += country_risk * weights['country_risk']
+    score += pep_risk * weights['pep_risk']
+    score += demographic * weights['demographic_risk']
+    score += geographic * weights['geographic_risk']
+    score = np.round(score, 2)
+    
+    category_code = np.searchsorted(RISK_CATEGORY_EDGES, score, side='right')
+    
+    return demographic, geographic, score, category_code
+
 class CustomerProfileGenerator:
     """
     Generate synthetic customer profiles with AML/KYC risk factors
     Enhances PaySim customer data with demographics, PEP status, and country risk
     """
     
-    def __init__(self):
+    def __init__(self, seed=None):
+        # Random generator shared by all profile draws (seed for reproducible profiles)
+        self._rng = np.random.default_rng(seed)
+        
         # Country risk ratings (based on Basel AML Index - simplified)
         self.country_risk = {
             'US': {'risk_score': 15, 'category': 'LOW'},
@@ -28,6 +60,28 @@ class CustomerProfileGenerator:
             'KP': {'risk_score': 100, 'category': 'CRITICAL'}
         }
         
+        # Column-wise copies of the country table, indexed by country position
+        self._countries = np.array(list(self.country_risk.keys()))
+        self._country_risk_scores = np.array(
+            [risk['risk_score'] for risk in self.country_risk.values()], dtype=np.int16
+        )
+        
+        # Nationality sampling weights (inverse to country risk)
+        self._country_weights = 1.0 / self._country_risk_scores
+        self._country_weights /= self._country_weights.sum()
+        
+        # Geographic risk lists
+        self.high_risk_jurisdictions = ['AF', 'IR', 'KP', 'RU']
+        self.sanctioned_countries = ['IR', 'KP', 'RU']  # Sanctions risk (simplified)
+        self.fatf_countries = ['AF', 'IR', 'KP']         # FATF grey/black list (simplified)
+        
+        # Per-country flag bits; the trailing 0 entry catches unknown codes (-1)
+        self._country_flags = np.zeros(len(self._countries) + 1, dtype=np.uint8)
+        for flag, flagged in ((FLAG_HIGH_RISK_JURISDICTION, self.high_risk_jurisdictions),
+                              (FLAG_SANCTIONS, self.sanctioned_countries),
+                              (FLAG_FATF, self.fatf_countries)):
+            self._country_flags[np.flatnonzero(np.isin(self._countries, flagged))] |= flag
+        
         # High-risk occupations for PEP classification
         self.high_risk_occupations = [
             'Government Official', 'Military Officer', 'Judge', 'Diplomat',
@@ -48,73 +102,81 @@ class CustomerProfileGenerator:
             (41, 60): 10,    # Established - lowest risk
             (61, 80): 25     # Elderly - medium risk (vulnerability)
         }
+        
+        # Age bucket edges/scores for vectorized lookup (ranges are contiguous)
+        self._age_edges = np.array([low for low, _ in self.age_risk_mapping] +
+                                   [max(high for _, high in self.age_risk_mapping) + 1])
+        self._age_scores = np.array(list(self.age_risk_mapping.values()))
     
     def generate_customer_demographics(self, customer_ids):
         """Generate demographic profiles for customers"""
         print(f"Generating demographic profiles for {len(customer_ids):,} customers...")
         
-        profiles = []
-        countries = list(self.country_risk.keys())
-        country_weights = [1/risk['risk_score'] for risk in self.country_risk.values()]
-        
-        for customer_id in customer_ids:
-            # Generate basic demographics
-            age = np.random.randint(18, 81)
-            nationality = np.random.choice(countries, p=np.array(country_weights)/sum(country_weights))
-            
-            # Determine PEP status (2% chance for high-risk occupations)
-            is_pep = np.random.random() < 0.02
-            if is_pep:
-                occupation = np.random.choice(self.high_risk_occupations)
-                pep_category = 'DOMESTIC_PEP' if np.random.random() < 0.7 else 'FOREIGN_PEP'
-            else:
-                occupation = np.random.choice(self.standard_occupations)
-                pep_category = 'NOT_PEP'
-            
-            # Account information
-            account_age_days = np.random.randint(30, 3650)  # 1 month to 10 years
-            kyc_status = np.random.choice(['COMPLETE', 'PENDING', 'INCOMPLETE'], p=[0.85, 0.10, 0.05])
-            
-            # Risk factors
-            country_risk_score = self.country_risk[nationality]['risk_score']
-            age_risk_score = self._get_age_risk_score(age)
-            pep_risk_score = 80 if is_pep else 0
-            
-            profiles.append({
-                'customer_id': customer_id,
-                'age': age,
-                'nationality': nationality,
-                'occupation': occupation,
-                'is_pep': is_pep,
-                'pep_category': pep_category,
-                'account_age_days': account_age_days,
-                'kyc_status': kyc_status,
-                'country_risk_score': country_risk_score,
-                'age_risk_score': age_risk_score,
-                'pep_risk_score': pep_risk_score
-            })
-        
-        return pd.DataFrame(profiles)
+        n = len(customer_ids)
+        rng = self._rng
+
+        # Generate basic demographics (one draw per column for all customers)
+        ages = rng.integers(18, 81, n)
+        nat_idx = rng.choice(len(self._countries), size=n, p=self._country_weights)
+
+        # Determine PEP status (2% chance for high-risk occupations)
+        is_pep = rng.random(n) < 0.02
+        occupation = np.where(
+            is_pep,
+            rng.choice(self.high_risk_occupations, n),
+            rng.choice(self.standard_occupations, n)
+        )
+        pep_category = np.where(
+            is_pep,
+            np.where(rng.random(n) < 0.7, 'DOMESTIC_PEP', 'FOREIGN_PEP'),
+            'NOT_PEP'
+        )
+
+        # Account information
+        account_age_days = rng.integers(30, 3650, n)  # 1 month to 10 years
+        kyc_status = rng.choice(['COMPLETE', 'PENDING', 'INCOMPLETE'], n, p=[0.85, 0.10, 0.05])
+
+        # Risk factors
+        country_risk_score = self._country_risk_scores[nat_idx]
+        age_risk_score = self._get_age_risk_scores(ages)
+        pep_risk_score = np.where(is_pep, 80, 0)
+
+        return pd.DataFrame({
+            'customer_id': customer_ids,
+            'age': ages,
+            'nationality': self._countries[nat_idx],
+            'occupation': occupation,
+            'is_pep': is_pep,
+            'pep_category': pep_category,
+            'account_age_days': account_age_days,
+            'kyc_status': kyc_status,
+            'country_risk_score': country_risk_score,
+            'age_risk_score': age_risk_score,
+            'pep_risk_score': pep_risk_score
+        })
     
     def _get_age_risk_score(self, age):
         """Calculate risk score based on age"""
-        for age_range, risk_score in self.age_risk_mapping.items():
-            if age_range[0] <= age <= age_range[1]:
-                return risk_score
-        return 20  # Default risk score
+        return int(self._get_age_risk_scores(np.array([age]))[0])
+    
+    def _get_age_risk_scores(self, ages):
+        """Calculate risk scores for an array of ages via bucket lookup"""
+        bucket = np.searchsorted(self._age_edges, ages, side='right') - 1
+        in_range = (bucket >= 0) & (bucket < len(self._age_scores))
+        scores = self._age_scores[np.clip(bucket, 0, len(self._age_scores) - 1)]
+        return np.where(in_range, scores, 20)  # Default risk score outside mapped ranges
     
     def enhance_with_geographic_risk(self, profiles_df):
         """Add geographic risk indicators"""
         print("Adding geographic risk indicators...")
         
-        # High-risk jurisdiction flags
-        profiles_df['high_risk_jurisdiction'] = profiles_df['nationality'].isin(['AF', 'IR', 'KP', 'RU'])
+        # One flag lookup per customer by country code
+        country_codes = pd.Categorical(profiles_df['nationality'], categories=self._countries).codes
+        flags = self._country_flags[country_codes]
         
-        # Sanctions risk (simplified)
-        profiles_df['sanctions_risk'] = profiles_df['nationality'].isin(['IR', 'KP', 'RU'])
-        
-        # FATF grey/black list (simplified)
-        profiles_df['fatf_risk'] = profiles_df['nationality'].isin(['AF', 'IR', 'KP'])
+        profiles_df['high_risk_jurisdiction'] = (flags & FLAG_HIGH_RISK_JURISDICTION) != 0
+        profiles_df['sanctions_risk'] = (flags & FLAG_SANCTIONS) != 0
+        profiles_df['fatf_risk'] = (flags & FLAG_FATF) != 0
         
         return profiles_df
     
@@ -138,46 +200,44 @@ class CustomerProfileGenerator:
             'geographic_risk': 0.05      # Additional geographic flags
         }
         
-        # Calculate enhanced risk components
-        enhanced_df['demographic_risk_score'] = (
-            enhanced_df['age_risk_score'] + 
-            (enhanced_df['kyc_status'] == 'INCOMPLETE').astype(int) * 30 +
-            (enhanced_df['account_age_days'] < 90).astype(int) * 20  # New accounts
+        # Fused scoring pass over the raw input columns
+        demographic, geographic, score, category_code = _fused_risk_scores(
+            enhanced_df['risk_score'].fillna(0).to_numpy(),
+            enhanced_df['country_risk_score'].to_numpy(),
+            enhanced_df['pep_risk_score'].to_numpy(),
+            enhanced_df['age_risk_score'].to_numpy(),
+            (enhanced_df['kyc_status'] == 'INCOMPLETE').to_numpy(),
+            (enhanced_df['account_age_days'] < 90).to_numpy(),  # New accounts
+            enhanced_df['high_risk_jurisdiction'].to_numpy(dtype=bool),
+            enhanced_df['sanctions_risk'].to_numpy(dtype=bool),
+            enhanced_df['fatf_risk'].to_numpy(dtype=bool),
+            weights
         )
         
-        enhanced_df['geographic_risk_score'] = (
-            enhanced_df['high_risk_jurisdiction'].astype(int) * 40 +
-            enhanced_df['sanctions_risk'].astype(int) * 60 +
-            enhanced_df['fatf_risk'].astype(int) * 80
-        )
+        enhanced_df['demographic_risk_score'] = demographic
+        enhanced_df['geographic_risk_score'] = geographic
+        enhanced_df['enhanced_risk_score'] = score
         
-        # Calculate final enhanced risk score
-        enhanced_df['enhanced_risk_score'] = (
-            enhanced_df['risk_score'].fillna(0) * weights['transaction_risk'] +
-            enhanced_df['country_risk_score'] * weights['country_risk'] +
-            enhanced_df['pep_risk_score'] * weights['pep_risk'] +
-            enhanced_df['demographic_risk_score'] * weights['demographic_risk'] +
-            enhanced_df['geographic_risk_score'] * weights['geographic_risk']
-        ).round(2)
-        
-        # Enhanced risk categories
-        enhanced_df['enhanced_risk_category'] = enhanced_df['enhanced_risk_score'].apply(
-            lambda x: 'CRITICAL' if x >= 85 else 
-                     'HIGH' if x >= 60 else 
-                     'MEDIUM' if x >= 30 else 'LOW'
+        # Enhanced risk categories (stored as codes into the ordered labels)
+        enhanced_df['enhanced_risk_category'] = pd.Categorical.from_codes(
+            category_code, categories=RISK_CATEGORY_LABELS, ordered=True
         )
         
         return enhanced_df
 
+ENHANCED_PROFILES_PATH = 'data/processed/enhanced_customer_profiles.parquet'
+
 def test_customer_profiler():
     """Test the customer profile generator"""
     print("=== TESTING CUSTOMER PROFILE GENERATOR ===")
     
     # Load existing risk scores
     from src.scoring.risk_engine import RiskScoringEngine
+    from src.etl.paysim_converter import load_paysim_transactions
+    from src.utils import top_n
     
     # Load PaySim data
-    df = pd.read_csv('data/raw/paysim_transactions.csv', nrows=5000)
+    df = load_paysim_transactions(columns=['nameOrig', 'type', 'amount', 'isFraud'], nrows=5000)
     
     # Get transaction risk scores
     engine = RiskScoringEngine()
@@ -206,7 +266,7 @@ def test_customer_profiler():
     print(enhanced_scores['pep_category'].value_counts())
     
     print("\nTop 10 highest enhanced risk customers:")
-    top_enhanced = enhanced_scores.nlargest(10, 'enhanced_risk_score')
+    top_enhanced = top_n(enhanced_scores, 'enhanced_risk_score')
     print(top_enhanced[['customer_id', 'enhanced_risk_score', 'enhanced_risk_category', 
                       'is_pep', 'nationality', 'fraud_count']])
     
@@ -215,8 +275,8 @@ def test_customer_profiler():
     print(f"Enhanced mean risk score: {enhanced_scores['enhanced_risk_score'].mean():.2f}")
     
     # Save enhanced profiles
-    enhanced_scores.to_csv('data/processed/enhanced_customer_profiles.csv', index=False)
-    print("\nEnhanced customer profiles saved to: data/processed/enhanced_customer_profiles.csv")
+    enhanced_scores.to_parquet(ENHANCED_PROFILES_PATH, compression='zstd', index=False)
+    print(f"\nEnhanced customer profiles saved to: {ENHANCED_PROFILES_PATH}")
     
     return enhanced_scores
 
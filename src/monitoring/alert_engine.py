@@ -1,8 +1,12 @@
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
 from datetime import datetime, timedelta
 from enum import Enum
-import uuid
+import os
+from src.utils import category_counts
 
 class AlertType(Enum):
     HIGH_RISK_CUSTOMER = "HIGH_RISK_CUSTOMER"
@@ -18,6 +22,37 @@ class AlertPriority(Enum):
     MEDIUM = "MEDIUM"
     LOW = "LOW"
 
+# Categorical dtypes for enum-like alert columns (priority ordered most to least urgent)
+ALERT_TYPE_DTYPE = pd.CategoricalDtype([alert_type.value for alert_type in AlertType])
+ALERT_PRIORITY_DTYPE = pd.CategoricalDtype([priority.value for priority in AlertPriority], ordered=True)
+
+# Character positions of the hex digits inside a canonical 36-char UUID string
+_UUID_HEX_POSITIONS = [i for i in range(36) if i not in (8, 13, 18, 23)]
+
+def _generate_alert_ids(n):
+    """Generate n random (version 4) UUID strings from a single urandom read"""
+    raw = np.frombuffer(os.urandom(16 * n), dtype=np.uint8).reshape(n, 16).copy()
+    raw[:, 6] = (raw[:, 6] & 0x0F) | 0x40  # Version 4
+    raw[:, 8] = (raw[:, 8] & 0x3F) | 0x80  # RFC 4122 variant
+    
+    hex_digits = np.frombuffer(raw.tobytes().hex().encode('ascii'), dtype=np.uint8).reshape(n, 32)
+    chars = np.full((n, 36), ord('-'), dtype=np.uint8)
+    chars[:, _UUID_HEX_POSITIONS] = hex_digits
+    
+    return chars.view('S36').ravel().astype(str)
+
+def _join_details(*parts):
+    """Concatenate string literals and columns into one details string per row"""
+    arrays = []
+    for part in parts:
+        if isinstance(part, pd.Series):
+            if pd.api.types.is_float_dtype(part):
+                part = part.astype(str)  # Keep Python float formatting (e.g. '85.0')
+            part = pa.array(part).cast(pa.string())
+        arrays.append(part)
+    
+    return pc.binary_join_element_wise(*arrays, '').to_numpy(zero_copy_only=False)
+
 class AMLAlertEngine:
     """
     AML Alert Generation Engine
@@ -60,91 +95,124 @@ class AMLAlertEngine:
                 'description': 'Historical fraud activity detected'
             }
         }
+        
+        # Alert column values per type, resolved once from the rules above
+        self._alert_templates = {
+            alert_type: {
+                'alert_type': alert_type.value,
+                'priority': rule['priority'].value,
+                'description': rule['description'],
+                'risk_level': self._determine_risk_level(alert_type)
+            }
+            for alert_type, rule in self.alert_rules.items()
+        }
     
     def generate_alerts(self, customer_profiles):
         """Generate alerts based on customer risk profiles"""
         print("Generating AML alerts...")
         
-        alerts = []
+        alert_frames = [
+            self._create_alerts(customer_profiles, alert_type, mask, details)
+            for alert_type, mask, details in self._evaluate_alert_conditions(customer_profiles)
+        ]
+        alert_frames = [frame for frame in alert_frames if len(frame) > 0]
         
-        for _, customer in customer_profiles.iterrows():
-            customer_alerts = self._evaluate_customer_alerts(customer)
-            alerts.extend(customer_alerts)
+        if not alert_frames:
+            return pd.DataFrame()
         
-        alerts_df = pd.DataFrame(alerts)
+        # Restore customer order (stable sort keeps rule order within a customer)
+        alerts_df = pd.concat(alert_frames, ignore_index=True)
+        alerts_df = alerts_df.sort_values('_row', kind='mergesort').drop(columns='_row')
+        alerts_df = alerts_df.reset_index(drop=True)
         
-        if len(alerts_df) > 0:
-            alerts_df['created_at'] = datetime.now()
-            alerts_df['status'] = 'OPEN'
-            alerts_df['assigned_to'] = None
+        alerts_df.insert(0, 'alert_id', _generate_alert_ids(len(alerts_df)))
+        alerts_df = alerts_df.astype({
+            'alert_type': ALERT_TYPE_DTYPE,
+            'priority': ALERT_PRIORITY_DTYPE,
+            'risk_level': ALERT_PRIORITY_DTYPE
+        })
+        alerts_df['created_at'] = datetime.now()
+        alerts_df['status'] = 'OPEN'
+        alerts_df['assigned_to'] = None
             
         return alerts_df
     
-    def _evaluate_customer_alerts(self, customer):
-        """Evaluate individual customer for alert conditions"""
-        alerts = []
+    def _evaluate_alert_conditions(self, customer_profiles):
+        """Evaluate alert conditions as boolean masks over all customers"""
+        conditions = []
+        risk_score = customer_profiles['enhanced_risk_score']
         
         # High Risk Score Alert
-        if customer['enhanced_risk_score'] >= self.alert_thresholds['critical_risk_score']:
-            alerts.append(self._create_alert(
-                customer['customer_id'],
-                AlertType.HIGH_RISK_CUSTOMER,
-                f"Critical risk score: {customer['enhanced_risk_score']}"
-            ))
-        elif customer['enhanced_risk_score'] >= self.alert_thresholds['high_risk_score']:
-            alerts.append(self._create_alert(
-                customer['customer_id'],
-                AlertType.HIGH_RISK_CUSTOMER,
-                f"High risk score: {customer['enhanced_risk_score']}"
-            ))
+        critical = risk_score >= self.alert_thresholds['critical_risk_score']
+        high = (risk_score >= self.alert_thresholds['high_risk_score']) & ~critical
+        conditions.append((
+            AlertType.HIGH_RISK_CUSTOMER,
+            critical,
+            _join_details('Critical risk score: ', risk_score[critical])
+        ))
+        conditions.append((
+            AlertType.HIGH_RISK_CUSTOMER,
+            high,
+            _join_details('High risk score: ', risk_score[high])
+        ))
         
         # PEP Alert
-        if customer['is_pep'] and self.alert_thresholds['pep_alert']:
-            alerts.append(self._create_alert(
-                customer['customer_id'],
+        if self.alert_thresholds['pep_alert']:
+            pep = customer_profiles['is_pep'].astype(bool)
+            conditions.append((
                 AlertType.PEP_DETECTED,
-                f"PEP Category: {customer['pep_category']}, Occupation: {customer['occupation']}"
+                pep,
+                _join_details(
+                    'PEP Category: ', customer_profiles.loc[pep, 'pep_category'],
+                    ', Occupation: ', customer_profiles.loc[pep, 'occupation']
+                )
             ))
         
         # Sanctions Alert
-        if customer['sanctions_risk'] and self.alert_thresholds['sanctions_alert']:
-            alerts.append(self._create_alert(
-                customer['customer_id'],
+        if self.alert_thresholds['sanctions_alert']:
+            sanctions = customer_profiles['sanctions_risk'].astype(bool)
+            conditions.append((
                 AlertType.SANCTIONS_MATCH,
-                f"Sanctioned jurisdiction: {customer['nationality']}"
+                sanctions,
+                _join_details('Sanctioned jurisdiction: ', customer_profiles.loc[sanctions, 'nationality'])
             ))
         
         # Fraud History Alert
-        if 'fraud_count' in customer and customer['fraud_count'] >= self.alert_thresholds['fraud_count_threshold']:
-            alerts.append(self._create_alert(
-                customer['customer_id'],
+        if 'fraud_count' in customer_profiles.columns:
+            fraud_count = customer_profiles['fraud_count']
+            fraud = fraud_count >= self.alert_thresholds['fraud_count_threshold']
+            conditions.append((
                 AlertType.FRAUD_INDICATOR,
-                f"Fraud history: {customer['fraud_count']} incidents"
+                fraud,
+                _join_details('Fraud history: ', fraud_count[fraud], ' incidents')
             ))
         
         # Large Transaction Alert (if transaction data available)
-        if 'total_amount' in customer and customer['total_amount'] >= self.alert_thresholds['large_transaction']:
-            alerts.append(self._create_alert(
-                customer['customer_id'],
+        if 'total_amount' in customer_profiles.columns:
+            total_amount = customer_profiles['total_amount']
+            large = total_amount >= self.alert_thresholds['large_transaction']
+            conditions.append((
                 AlertType.LARGE_TRANSACTION,
-                f"Large transaction volume: ${customer['total_amount']:,.2f}"
+                large,
+                _join_details('Large transaction volume: ', total_amount[large].map('${:,.2f}'.format))
             ))
         
-        return alerts
+        return conditions
     
-    def _create_alert(self, customer_id, alert_type, details):
-        """Create alert record"""
-        rule = self.alert_rules[alert_type]
+    def _create_alerts(self, customer_profiles, alert_type, mask, details):
+        """Create alert records for every customer matching an alert condition"""
+        template = self._alert_templates[alert_type]
+        mask = mask.to_numpy()
         
-        return {
-            'alert_id': str(uuid.uuid4()),
-            'customer_id': customer_id,
-            'alert_type': alert_type.value,
-            'priority': rule['priority'].value,
-            'description': rule['description'],
+        return pd.DataFrame({
+            '_row': np.flatnonzero(mask),
+            'customer_id': customer_profiles['customer_id'].to_numpy()[mask],
+            'alert_type': template['alert_type'],
+            'priority': template['priority'],
+            'description': template['description'],
             'details': details,
-            'risk_level': self._determine_risk_level(alert_type)
-        }
+            'risk_level': template['risk_level']
+        })
     
     def _determine_risk_level(self, alert_type):
         """Determine risk level based on alert type"""
@@ -164,8 +232,33 @@ class AlertMonitor:
     """
     
     def __init__(self):
-        self.active_alerts = pd.DataFrame()
-        self.alert_history = pd.DataFrame()
+        # Alert batches are buffered and only concatenated when read
+        self._active_chunks = []
+        self._history_chunks = []
+        self._active_df = None
+        self._history_df = None
+    
+    @property
+    def active_alerts(self):
+        """Active alerts across all processed batches"""
+        if self._active_df is None:
+            self._active_df = self._concat_chunks(self._active_chunks)
+            self._active_chunks = [self._active_df] if self._active_chunks else []
+        return self._active_df
+    
+    @property
+    def alert_history(self):
+        """Every alert processed by this monitor"""
+        if self._history_df is None:
+            self._history_df = self._concat_chunks(self._history_chunks)
+            self._history_chunks = [self._history_df] if self._history_chunks else []
+        return self._history_df
+    
+    def _concat_chunks(self, chunks):
+        """Concatenate buffered alert batches into a single frame"""
+        if not chunks:
+            return pd.DataFrame()
+        return pd.concat(chunks, ignore_index=True)
     
     def process_alerts(self, new_alerts):
         """Process and categorize new alerts"""
@@ -173,10 +266,12 @@ class AlertMonitor:
             return
         
         # Add to active alerts
-        self.active_alerts = pd.concat([self.active_alerts, new_alerts], ignore_index=True)
+        self._active_chunks.append(new_alerts)
+        self._active_df = None
         
         # Update alert history
-        self.alert_history = pd.concat([self.alert_history, new_alerts], ignore_index=True)
+        self._history_chunks.append(new_alerts)
+        self._history_df = None
         
         print(f"Processed {len(new_alerts)} new alerts")
     
@@ -187,9 +282,9 @@ class AlertMonitor:
         
         summary = {
             "total": len(self.active_alerts),
-            "by_priority": self.active_alerts['priority'].value_counts().to_dict(),
-            "by_type": self.active_alerts['alert_type'].value_counts().to_dict(),
-            "by_risk_level": self.active_alerts['risk_level'].value_counts().to_dict()
+            "by_priority": category_counts(self.active_alerts['priority']).to_dict(),
+            "by_type": category_counts(self.active_alerts['alert_type']).to_dict(),
+            "by_risk_level": category_counts(self.active_alerts['risk_level']).to_dict()
         }
         
         return summary
@@ -199,9 +294,14 @@ class AlertMonitor:
         if len(self.active_alerts) == 0:
             return pd.DataFrame()
         
-        high_priority = self.active_alerts[
-            self.active_alerts['priority'].isin(['CRITICAL', 'HIGH'])
-        ].sort_values('created_at', ascending=False)
+        # Ordered categorical priorities compare on codes; plain strings fall back to isin
+        priority = self.active_alerts['priority']
+        if isinstance(priority.dtype, pd.CategoricalDtype) and priority.cat.ordered:
+            is_high_priority = priority <= AlertPriority.HIGH.value
+        else:
+            is_high_priority = priority.isin([AlertPriority.CRITICAL.value, AlertPriority.HIGH.value])
+        
+        high_priority = self.active_alerts[is_high_priority].sort_values('created_at', ascending=False)
         
         return high_priority
     
@@ -215,13 +315,24 @@ class AlertMonitor:
                 self.active_alerts.loc[mask, 'resolution_notes'] = resolution_notes
                 print(f"Alert {alert_id} closed")
 
+ALERTS_PATH = 'data/processed/aml_alerts.parquet'
+
+def save_alerts(alerts, path=ALERTS_PATH):
+    """Write alerts to Parquet with dictionary-encoded enum columns"""
+    table = pa.Table.from_pandas(alerts, preserve_index=False)
+    dictionary_columns = [c for c in ('alert_type', 'priority', 'risk_level', 'status') if c in alerts.columns]
+    pq.write_table(table, path, compression='zstd', use_dictionary=dictionary_columns)
+    return path
+
 def test_alert_engine():
     """Test the AML alert engine"""
     print("=== TESTING AML ALERT ENGINE ===")
     
+    from src.features.customer_profiler import ENHANCED_PROFILES_PATH
+    
     # Load customer profiles
     try:
-        profiles = pd.read_csv('data/processed/enhanced_customer_profiles.csv')
+        profiles = pd.read_parquet(ENHANCED_PROFILES_PATH)
     except FileNotFoundError:
         print("Enhanced customer profiles not found. Run test_customer_profiler.py first.")
         return
@@ -253,8 +364,8 @@ def test_alert_engine():
             print(high_priority[['customer_id', 'alert_type', 'priority', 'details']].head(10))
         
         # Save alerts
-        alerts.to_csv('data/processed/aml_alerts.csv', index=False)
-        print(f"\nAlerts saved to: data/processed/aml_alerts.csv")
+        save_alerts(alerts)
+        print(f"\nAlerts saved to: {ALERTS_PATH}")
     else:
         print("No alerts generated")
     
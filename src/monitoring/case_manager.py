@@ -1,7 +1,9 @@
 import pandas as pd
+import numpy as np
 from datetime import datetime, timedelta
 from enum import Enum
 import uuid
+from src.utils import category_counts
 
 class CaseStatus(Enum):
     OPEN = "OPEN"
@@ -17,6 +19,14 @@ class CaseType(Enum):
     FRAUD_INVESTIGATION = "FRAUD_INVESTIGATION"
     ENHANCED_DUE_DILIGENCE = "ENHANCED_DUE_DILIGENCE"
 
+# Known values for the enum-like case columns (stored as categoricals)
+CASE_CATEGORIES = {
+    'status': [status.value for status in CaseStatus],
+    'case_type': [case_type.value for case_type in CaseType],
+    'priority': ['CRITICAL', 'HIGH', 'MEDIUM', 'LOW'],
+    'risk_level': ['CRITICAL', 'HIGH', 'MEDIUM', 'LOW']
+}
+
 class AMLCaseManager:
     """
     AML Case Management System
@@ -24,8 +34,12 @@ class AMLCaseManager:
     """
     
     def __init__(self):
-        self.cases = pd.DataFrame()
-        self.case_actions = pd.DataFrame()
+        # Case and action records are buffered as dicts; frames are built on read
+        self._cases_list = []
+        self._actions_list = []
+        self._case_index = {}  # case_id -> position in _cases_list
+        self._cases_df = None
+        self._actions_df = None
         
         self.sla_hours = {
             'CRITICAL': 4,   # 4 hours for critical cases
@@ -33,140 +47,237 @@ class AMLCaseManager:
             'MEDIUM': 72,    # 72 hours for medium priority
             'LOW': 168       # 1 week for low priority
         }
+        
+        # Case type value per alert type
+        self._case_type_for_alert = {
+            'PEP_DETECTED': CaseType.PEP_REVIEW.value,
+            'SANCTIONS_MATCH': CaseType.SANCTIONS_CHECK.value,
+            'FRAUD_INDICATOR': CaseType.FRAUD_INVESTIGATION.value,
+            'HIGH_RISK_CUSTOMER': CaseType.ENHANCED_DUE_DILIGENCE.value,
+            'LARGE_TRANSACTION': CaseType.AML_INVESTIGATION.value,
+            'SUSPICIOUS_PATTERN': CaseType.AML_INVESTIGATION.value
+        }
+        
+        # Simplified assignment logic: analyst per priority
+        self._assign_map = {
+            'CRITICAL': 'Senior_AML_Analyst',
+            'HIGH': 'AML_Analyst_Team'
+        }
+    
+    @property
+    def cases(self):
+        """All cases as a DataFrame (rebuilt only after changes)"""
+        if self._cases_df is None:
+            cases = pd.DataFrame(self._cases_list)
+            for column, known in CASE_CATEGORIES.items():
+                if column in cases.columns:
+                    # Unexpected values are kept as extra categories rather than dropped
+                    extra = sorted(set(cases[column].dropna().astype(str)) - set(known))
+                    cases[column] = pd.Categorical(cases[column], categories=known + extra)
+            self._cases_df = cases
+        return self._cases_df
     
-    def create_case_from_alert(self, alert):
+    @property
+    def case_actions(self):
+        """Case audit trail as a DataFrame (rebuilt only after changes)"""
+        if self._actions_df is None:
+            self._actions_df = pd.DataFrame(self._actions_list)
+        return self._actions_df
+    
+    def create_case_from_alert(self, alert, now=None):
         """Create investigation case from alert"""
+        now = now or datetime.now()
         case_type = self._determine_case_type(alert['alert_type'])
         
         case = {
-            'case_id': str(uuid.uuid4()),
+            'case_id': uuid.uuid4().hex,
             'customer_id': alert['customer_id'],
             'alert_id': alert['alert_id'],
-            'case_type': case_type.value,
+            'case_type': case_type,
             'priority': alert['priority'],
             'status': CaseStatus.OPEN.value,
-            'created_at': datetime.now(),
+            'created_at': now,
             'assigned_to': self._auto_assign_case(alert['priority']),
-            'due_date': self._calculate_due_date(alert['priority']),
+            'due_date': self._calculate_due_date(alert['priority'], now),
             'description': f"Investigation case for {alert['alert_type']}: {alert['details']}",
             'risk_level': alert['risk_level']
         }
         
-        # Add to cases dataframe
-        new_case_df = pd.DataFrame([case])
-        self.cases = pd.concat([self.cases, new_case_df], ignore_index=True)
+        # Add to case records
+        self._case_index[case['case_id']] = len(self._cases_list)
+        self._cases_list.append(case)
+        self._cases_df = None
         
         # Log case creation
-        self._log_case_action(case['case_id'], 'CASE_CREATED', 'Case automatically created from alert')
+        self._log_case_action(case['case_id'], 'CASE_CREATED', 'Case automatically created from alert', timestamp=now)
         
         return case['case_id']
     
+    def create_cases_from_alerts(self, alerts):
+        """Create investigation cases for every alert in a DataFrame"""
+        # One timestamp for the whole batch
+        now = datetime.now()
+        return [self.create_case_from_alert(alert, now) for alert in alerts.to_dict('records')]
+    
+    def bulk_create_from_alerts(self, alerts):
+        """Create investigation cases for every alert in a DataFrame, column-wise"""
+        n = len(alerts)
+        if n == 0:
+            return []
+        
+        now = datetime.now()
+        priorities = alerts['priority'].astype(str).to_numpy()
+        alert_types = alerts['alert_type'].astype(str)
+        
+        # Column-wise case fields
+        case_ids = [uuid.uuid4().hex for _ in range(n)]
+        case_types = alert_types.map(self._case_type_for_alert).fillna(CaseType.AML_INVESTIGATION.value).to_numpy()
+        assigned_to = pd.Series(self._assign_map).reindex(priorities).fillna('Junior_AML_Analyst').to_numpy()
+        hours = pd.Series(self.sla_hours).reindex(priorities).fillna(168).to_numpy()
+        due_dates = (pd.Timestamp(now) + pd.to_timedelta(hours, unit='h')).to_pydatetime()
+        descriptions = ("Investigation case for " + alert_types + ": " + alerts['details'].astype(str)).to_numpy()
+        
+        cases = [
+            {
+                'case_id': case_id,
+                'customer_id': customer_id,
+                'alert_id': alert_id,
+                'case_type': case_type,
+                'priority': priority,
+                'status': CaseStatus.OPEN.value,
+                'created_at': now,
+                'assigned_to': assignee,
+                'due_date': due_date,
+                'description': description,
+                'risk_level': risk_level
+            }
+            for case_id, customer_id, alert_id, case_type, priority, assignee, due_date, description, risk_level in zip(
+                case_ids, alerts['customer_id'].tolist(), alerts['alert_id'].tolist(), case_types.tolist(),
+                priorities.tolist(), assigned_to.tolist(), due_dates, descriptions.tolist(),
+                alerts['risk_level'].tolist()
+            )
+        ]
+        
+        # Add to case records in one extend
+        start = len(self._cases_list)
+        self._case_index.update(zip(case_ids, range(start, start + n)))
+        self._cases_list.extend(cases)
+        self._cases_df = None
+        
+        # Log case creation
+        self._actions_list.extend(
+            self._action_record(case_id, 'CASE_CREATED', 'Case automatically created from alert', 'SYSTEM', now)
+            for case_id in case_ids
+        )
+        self._actions_df = None
+        
+        return case_ids
+    
     def _determine_case_type(self, alert_type):
         """Determine case type based on alert type"""
-        mapping = {
-            'PEP_DETECTED': CaseType.PEP_REVIEW,
-            'SANCTIONS_MATCH': CaseType.SANCTIONS_CHECK,
-            'FRAUD_INDICATOR': CaseType.FRAUD_INVESTIGATION,
-            'HIGH_RISK_CUSTOMER': CaseType.ENHANCED_DUE_DILIGENCE,
-            'LARGE_TRANSACTION': CaseType.AML_INVESTIGATION,
-            'SUSPICIOUS_PATTERN': CaseType.AML_INVESTIGATION
-        }
-        return mapping.get(alert_type, CaseType.AML_INVESTIGATION)
+        return self._case_type_for_alert.get(alert_type, CaseType.AML_INVESTIGATION.value)
     
     def _auto_assign_case(self, priority):
         """Auto-assign cases based on priority"""
-        # Simplified assignment logic
-        if priority == 'CRITICAL':
-            return 'Senior_AML_Analyst'
-        elif priority == 'HIGH':
-            return 'AML_Analyst_Team'
-        else:
-            return 'Junior_AML_Analyst'
-    
-    def _calculate_due_date(self, priority):
+        return self._assign_map.get(priority, 'Junior_AML_Analyst')
+    
+    def _calculate_due_date(self, priority, now=None):
         """Calculate case due date based on SLA"""
         hours = self.sla_hours.get(priority, 168)
-        return datetime.now() + timedelta(hours=hours)
+        return (now or datetime.now()) + timedelta(hours=hours)
+    
+    def _find_case(self, case_id):
+        """Find case record by ID"""
+        position = self._case_index.get(case_id)
+        return self._cases_list[position] if position is not None else None
     
     def update_case_status(self, case_id, new_status, notes=""):
         """Update case status"""
-        if len(self.cases) > 0:
-            mask = self.cases['case_id'] == case_id
-            if mask.any():
-                old_status = self.cases.loc[mask, 'status'].iloc[0]
-                self.cases.loc[mask, 'status'] = new_status
-                self.cases.loc[mask, 'last_updated'] = datetime.now()
-                
-                # Log status change
-                self._log_case_action(
-                    case_id, 
-                    'STATUS_CHANGED', 
-                    f"Status changed from {old_status} to {new_status}. {notes}"
-                )
-                
-                print(f"Case {case_id} status updated to {new_status}")
+        case = self._find_case(case_id)
+        if case is not None:
+            old_status = case['status']
+            case['status'] = new_status
+            case['last_updated'] = datetime.now()
+            self._cases_df = None
+            
+            # Log status change
+            self._log_case_action(
+                case_id, 
+                'STATUS_CHANGED', 
+                f"Status changed from {old_status} to {new_status}. {notes}"
+            )
+            
+            print(f"Case {case_id} status updated to {new_status}")
     
     def assign_case(self, case_id, analyst_name):
         """Assign case to analyst"""
-        if len(self.cases) > 0:
-            mask = self.cases['case_id'] == case_id
-            if mask.any():
-                self.cases.loc[mask, 'assigned_to'] = analyst_name
-                self.cases.loc[mask, 'last_updated'] = datetime.now()
-                
-                self._log_case_action(case_id, 'CASE_ASSIGNED', f"Case assigned to {analyst_name}")
-                print(f"Case {case_id} assigned to {analyst_name}")
+        case = self._find_case(case_id)
+        if case is not None:
+            case['assigned_to'] = analyst_name
+            case['last_updated'] = datetime.now()
+            self._cases_df = None
+            
+            self._log_case_action(case_id, 'CASE_ASSIGNED', f"Case assigned to {analyst_name}")
+            print(f"Case {case_id} assigned to {analyst_name}")
     
     def add_case_notes(self, case_id, notes, analyst_name):
         """Add investigation notes to case"""
         self._log_case_action(case_id, 'NOTES_ADDED', notes, analyst_name)
         print(f"Notes added to case {case_id}")
     
-    def _log_case_action(self, case_id, action_type, description, analyst_name="SYSTEM"):
+    def _log_case_action(self, case_id, action_type, description, analyst_name="SYSTEM", timestamp=None):
         """Log case action"""
-        action = {
-            'action_id': str(uuid.uuid4()),
+        self._actions_list.append(
+            self._action_record(case_id, action_type, description, analyst_name, timestamp or datetime.now())
+        )
+        self._actions_df = None
+    
+    def _action_record(self, case_id, action_type, description, analyst_name, timestamp):
+        """Build one audit-trail action record"""
+        return {
+            'action_id': uuid.uuid4().hex,
             'case_id': case_id,
             'action_type': action_type,
             'description': description,
             'analyst_name': analyst_name,
-            'timestamp': datetime.now()
+            'timestamp': timestamp
         }
-        
-        new_action_df = pd.DataFrame([action])
-        self.case_actions = pd.concat([self.case_actions, new_action_df], ignore_index=True)
     
     def get_case_summary(self):
         """Get summary of all cases"""
-        if len(self.cases) == 0:
+        if not self._cases_list:
             return {"total": 0}
         
+        counts = {column: category_counts(self.cases[column]).to_dict() for column in ('status', 'priority', 'case_type')}
         summary = {
             "total": len(self.cases),
-            "by_status": self.cases['status'].value_counts().to_dict(),
-            "by_priority": self.cases['priority'].value_counts().to_dict(),
-            "by_type": self.cases['case_type'].value_counts().to_dict(),
-            "overdue": len(self.get_overdue_cases())
+            "by_status": counts['status'],
+            "by_priority": counts['priority'],
+            "by_type": counts['case_type'],
+            "overdue": int(self._overdue_mask().sum())
         }
         
         return summary
     
+    def _overdue_mask(self):
+        """Boolean mask of open cases past their due date"""
+        # Integer nanosecond compare on due dates, code compare on the categorical status
+        due_ns = self.cases['due_date'].to_numpy(dtype='datetime64[ns]').view('i8')
+        now_ns = np.datetime64(datetime.now(), 'ns').astype('i8')
+        status = self.cases['status'].cat
+        not_closed = status.codes.to_numpy() != status.categories.get_loc(CaseStatus.CLOSED.value)
+        return (due_ns < now_ns) & not_closed
+    
     def get_overdue_cases(self):
         """Get cases that are past due date"""
-        if len(self.cases) == 0:
+        if not self._cases_list:
             return pd.DataFrame()
         
-        now = datetime.now()
-        overdue = self.cases[
-            (self.cases['due_date'] < now) & 
-            (self.cases['status'] != 'CLOSED')
-        ]
-        
-        return overdue
+        return self.cases[self._overdue_mask()]
     
     def get_high_priority_cases(self):
         """Get critical and high priority open cases"""
-        if len(self.cases) == 0:
+        if not self._cases_list:
             return pd.DataFrame()
         
         high_priority = self.cases[
@@ -181,19 +292,24 @@ class AMLCaseManager:
         self.update_case_status(case_id, CaseStatus.CLOSED.value)
         self._log_case_action(case_id, 'CASE_CLOSED', f"Case closed. Resolution: {resolution}", analyst_name)
         
-        if len(self.cases) > 0:
-            mask = self.cases['case_id'] == case_id
-            if mask.any():
-                self.cases.loc[mask, 'closed_at'] = datetime.now()
-                self.cases.loc[mask, 'resolution'] = resolution
+        case = self._find_case(case_id)
+        if case is not None:
+            case['closed_at'] = datetime.now()
+            case['resolution'] = resolution
+            self._cases_df = None
+
+CASES_PATH = 'data/processed/aml_cases.parquet'
+CASE_ACTIONS_PATH = 'data/processed/case_actions.parquet'
 
 def test_case_manager():
     """Test the AML case management system"""
     print("=== TESTING AML CASE MANAGER ===")
     
+    from src.monitoring.alert_engine import ALERTS_PATH
+    
     # Load alerts if available
     try:
-        alerts = pd.read_csv('data/processed/aml_alerts.csv')
+        alerts = pd.read_parquet(ALERTS_PATH)
     except FileNotFoundError:
         print("No alerts found. Run alert engine test first.")
         return
@@ -204,10 +320,7 @@ def test_case_manager():
     # Create cases from high priority alerts
     high_priority_alerts = alerts[alerts['priority'].isin(['CRITICAL', 'HIGH'])]
     
-    case_ids = []
-    for _, alert in high_priority_alerts.head(5).iterrows():  # Test with first 5
-        case_id = case_manager.create_case_from_alert(alert)
-        case_ids.append(case_id)
+    case_ids = case_manager.bulk_create_from_alerts(high_priority_alerts.head(5))  # Test with first 5
     
     print(f"\nCreated {len(case_ids)} investigation cases")
     
@@ -236,12 +349,12 @@ def test_case_manager():
     
     # Save case data
     if len(case_manager.cases) > 0:
-        case_manager.cases.to_csv('data/processed/aml_cases.csv', index=False)
-        print(f"\nCases saved to: data/processed/aml_cases.csv")
+        case_manager.cases.to_parquet(CASES_PATH, index=False)
+        print(f"\nCases saved to: {CASES_PATH}")
     
     if len(case_manager.case_actions) > 0:
-        case_manager.case_actions.to_csv('data/processed/case_actions.csv', index=False)
-        print(f"Case actions saved to: data/processed/case_actions.csv")
+        case_manager.case_actions.to_parquet(CASE_ACTIONS_PATH, index=False)
+        print(f"Case actions saved to: {CASE_ACTIONS_PATH}")
     
     print("\n=== AML CASE MANAGER TEST COMPLETE ===")
     return case_manager
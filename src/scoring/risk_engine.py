@@ -1,5 +1,56 @@
 import pandas as pd
 import numpy as np
+from bisect import bisect_right
+
+def _amount_score_vec(max_amount, avg_amount, high_amount, medium_amount):
+    """Amount risk scores from per-customer max/average transaction amounts"""
+    return np.select(
+        [max_amount >= high_amount, max_amount >= medium_amount, avg_amount >= 50000],
+        [90, 60, 30],
+        default=10
+    )
+
+def _fraud_score_vec(fraud_count, tx_count):
+    """Fraud history scores from per-customer fraud and transaction counts"""
+    fraud_count = np.asarray(fraud_count, dtype=float)
+    tx_count = np.asarray(tx_count)
+    fraud_rate = np.divide(fraud_count, tx_count, out=np.zeros_like(fraud_count), where=tx_count > 0)
+    
+    # Fraud history is the strongest predictor
+    return np.select(
+        [fraud_rate >= 0.5, fraud_rate >= 0.1, fraud_count > 0],  # 50%+, 10%+, any fraud
+        [100, 80, 60],
+        default=0
+    )
+
+def _cash_score_vec(cash_out_rate):
+    """Cash pattern scores from per-customer cash-out rates"""
+    # High cash-out activity is suspicious
+    return np.select(
+        [cash_out_rate >= 0.8, cash_out_rate >= 0.5, cash_out_rate >= 0.2],  # 80%+, 50%+, 20%+
+        [80, 60, 30],
+        default=10
+    )
+
+def _customer_aggregates(customer_codes, n_customers, amounts, is_fraud, is_cash_out, type_scores):
+    """Per-customer reductions in one pass per column, keyed by integer customer codes"""
+    valid = customer_codes >= 0
+    codes = customer_codes[valid]
+    
+    def total(values):
+        return np.bincount(codes, weights=values[valid], minlength=n_customers)
+    
+    max_amount = np.full(n_customers, -np.inf)
+    np.maximum.at(max_amount, codes, amounts[valid])
+    
+    return {
+        'tx_count': np.bincount(codes, minlength=n_customers),
+        'max_amount': max_amount,
+        'total_amount': total(amounts),
+        'fraud_count': total(is_fraud.astype(float)).astype(np.int64),
+        'cash_out_count': total(is_cash_out.astype(float)).astype(np.int64),
+        'type_score_sum': total(type_scores)
+    }
 
 class RiskScoringEngine:
     """
@@ -25,6 +76,9 @@ class RiskScoringEngine:
             'high_risk': 85
         }
         
+        # Risk categories in ascending order of the threshold bins
+        self.risk_categories = np.array(['LOW', 'MEDIUM', 'HIGH', 'CRITICAL'])
+        
         # Transaction type risk scores
         self.tx_type_scores = {
             'TRANSFER': 85,      # 1.04% fraud rate (highest)
@@ -33,15 +87,15 @@ class RiskScoringEngine:
             'CASH_IN': 10,       # 0.00% fraud rate (low)
             'DEBIT': 10          # 0.00% fraud rate (low)
         }
+        
+        # Running per-customer aggregates for incremental (streaming) scoring
+        self._agg = {}
     
     def calculate_transaction_type_score(self, customer_data):
         """Calculate risk score based on transaction types"""
         if 'type' not in customer_data.columns:
             return 0
         
-        # Get most frequent transaction type
-        most_common_type = customer_data['type'].mode().iloc[0] if len(customer_data) > 0 else 'PAYMENT'
-        
         # Calculate weighted score based on transaction mix
         type_counts = customer_data['type'].value_counts()
         total_tx = len(customer_data)
@@ -62,17 +116,10 @@ class RiskScoringEngine:
         max_amount = customer_data['amount'].max()
         avg_amount = customer_data['amount'].mean()
         
-        # High amount transactions
-        if max_amount >= self.thresholds['high_amount']:
-            amount_score = 90
-        elif max_amount >= self.thresholds['medium_amount']:
-            amount_score = 60
-        elif avg_amount >= 50000:
-            amount_score = 30
-        else:
-            amount_score = 10
-        
-        return amount_score
+        return int(_amount_score_vec(
+            np.array([max_amount]), np.array([avg_amount]),
+            self.thresholds['high_amount'], self.thresholds['medium_amount']
+        )[0])
     
     def calculate_fraud_history_score(self, customer_data):
         """Calculate risk score based on fraud history"""
@@ -81,17 +128,8 @@ class RiskScoringEngine:
         
         fraud_count = customer_data['isFraud'].sum()
         total_tx = len(customer_data)
-        fraud_rate = fraud_count / total_tx if total_tx > 0 else 0
-        
-        # Fraud history is the strongest predictor
-        if fraud_rate >= 0.5:  # 50%+ fraud rate
-            return 100
-        elif fraud_rate >= 0.1:  # 10%+ fraud rate
-            return 80
-        elif fraud_count > 0:  # Any fraud history
-            return 60
-        else:
-            return 0
+        
+        return int(_fraud_score_vec(np.array([fraud_count]), np.array([total_tx]))[0])
     
     def calculate_cash_pattern_score(self, customer_data):
         """Calculate risk score based on cash transaction patterns"""
@@ -102,15 +140,7 @@ class RiskScoringEngine:
         total_tx = len(customer_data)
         cash_out_rate = cash_out_count / total_tx if total_tx > 0 else 0
         
-        # High cash-out activity is suspicious
-        if cash_out_rate >= 0.8:  # 80%+ cash-out
-            return 80
-        elif cash_out_rate >= 0.5:  # 50%+ cash-out
-            return 60
-        elif cash_out_rate >= 0.2:  # 20%+ cash-out
-            return 30
-        else:
-            return 10
+        return int(_cash_score_vec(np.array([cash_out_rate]))[0])
     
     def calculate_customer_risk_score(self, customer_data):
         """Calculate overall risk score for a customer"""
@@ -120,6 +150,10 @@ class RiskScoringEngine:
         fraud_score = self.calculate_fraud_history_score(customer_data)
         cash_score = self.calculate_cash_pattern_score(customer_data)
         
+        return self._combine_scores(tx_type_score, amount_score, fraud_score, cash_score)
+    
+    def _combine_scores(self, tx_type_score, amount_score, fraud_score, cash_score):
+        """Weighted total, risk category and rounded components from the four component scores"""
         # Calculate weighted total score
         total_score = (
             tx_type_score * self.weights['transaction_type'] +
@@ -139,44 +173,157 @@ class RiskScoringEngine:
             }
         }
     
+    def _type_scores(self, tx_type):
+        """Per-transaction type scores gathered from the categorical codes of tx_type"""
+        # One score per category; the trailing default also catches missing types (code -1)
+        lut = np.array([self.tx_type_scores.get(c, 10) for c in tx_type.cat.categories] + [10], dtype=float)
+        return lut[tx_type.cat.codes.to_numpy()]
+    
+    def add_transaction(self, customer_id, tx_type, amount, is_fraud=0):
+        """Fold a single transaction into the customer's running aggregates"""
+        agg = self._agg.get(customer_id)
+        if agg is None:
+            agg = self._agg[customer_id] = {'n': 0, 'max': 0.0, 'sum': 0.0, 'fraud': 0, 'cashout': 0, 'type_score_sum': 0.0}
+        
+        agg['n'] += 1
+        agg['max'] = max(agg['max'], amount) if agg['n'] > 1 else amount
+        agg['sum'] += amount
+        agg['fraud'] += int(is_fraud)
+        agg['cashout'] += tx_type == 'CASH_OUT'
+        agg['type_score_sum'] += self.tx_type_scores.get(tx_type, 10)
+    
+    def load_transactions(self, transaction_data):
+        """Fold a batch of transactions into the running aggregates with one groupby"""
+        tx_type = transaction_data['type'].astype('category')
+        df = transaction_data.assign(
+            is_cash_out=(tx_type == 'CASH_OUT'),
+            type_score=self._type_scores(tx_type)
+        )
+        batch = df.groupby('nameOrig', sort=False, observed=True).agg(
+            n=('amount', 'size'),
+            max=('amount', 'max'),
+            sum=('amount', 'sum'),
+            fraud=('isFraud', 'sum'),
+            cashout=('is_cash_out', 'sum'),
+            type_score_sum=('type_score', 'sum')
+        )
+        
+        # Hydrate new customers, merge counters into existing ones
+        for customer_id, row in zip(batch.index.tolist(), batch.to_dict('records')):
+            agg = self._agg.get(customer_id)
+            if agg is None:
+                self._agg[customer_id] = row
+            else:
+                agg['max'] = max(agg['max'], row['max'])
+                for key in ('n', 'sum', 'fraud', 'cashout', 'type_score_sum'):
+                    agg[key] += row[key]
+    
+    def calculate_streaming_risk_score(self, customer_id):
+        """Calculate a customer's risk score from the running aggregates (no DataFrame filtering)"""
+        agg = self._agg.get(customer_id)
+        if agg is None or agg['n'] == 0:
+            return None
+        
+        n = agg['n']
+        tx_type_score = min(agg['type_score_sum'] / n, 100)
+        amount_score = int(_amount_score_vec(
+            np.array([agg['max']]), np.array([agg['sum'] / n]),
+            self.thresholds['high_amount'], self.thresholds['medium_amount']
+        )[0])
+        fraud_score = int(_fraud_score_vec(np.array([agg['fraud']]), np.array([n]))[0])
+        cash_score = int(_cash_score_vec(np.array([agg['cashout'] / n]))[0])
+        
+        return self._combine_scores(tx_type_score, amount_score, fraud_score, cash_score)
+    
+    @property
+    def _category_edges(self):
+        """Category bin edges: below low_risk is LOW, at/above high_risk is CRITICAL"""
+        return [self.thresholds['low_risk'], self.thresholds['medium_risk'], self.thresholds['high_risk']]
+    
     def get_risk_category(self, score):
         """Convert numeric score to risk category"""
-        if score >= self.thresholds['high_risk']:
-            return 'CRITICAL'
-        elif score >= self.thresholds['medium_risk']:
-            return 'HIGH'
-        elif score >= self.thresholds['low_risk']:
-            return 'MEDIUM'
-        else:
-            return 'LOW'
+        return str(self.risk_categories[bisect_right(self._category_edges, score)])
+    
+    def get_risk_categories(self, scores):
+        """Convert an array of numeric scores to risk categories"""
+        return self.risk_categories[np.digitize(scores, self._category_edges)]
     
     def score_customer_portfolio(self, transaction_data):
         """Score all customers in the dataset"""
         print("Calculating risk scores for customer portfolio...")
         
-        customer_scores = []
-        customers = transaction_data['nameOrig'].unique()
-        
-        for customer_id in customers:
-            customer_data = transaction_data[transaction_data['nameOrig'] == customer_id]
-            risk_result = self.calculate_customer_risk_score(customer_data)
-            
-            customer_scores.append({
-                'customer_id': customer_id,
-                'risk_score': risk_result['total_score'],
-                'risk_category': risk_result['risk_category'],
-                'tx_count': len(customer_data),
-                'total_amount': customer_data['amount'].sum(),
-                'fraud_count': customer_data['isFraud'].sum() if 'isFraud' in customer_data.columns else 0,
-                'components': risk_result['components']
-            })
-        
-        return pd.DataFrame(customer_scores)
+        has_type = 'type' in transaction_data.columns
+        has_fraud = 'isFraud' in transaction_data.columns
+        
+        # Categorical type: comparisons and score mapping work on the few categories
+        tx_type = transaction_data['type'].astype('category') if has_type else None
+        n_tx = len(transaction_data)
+        
+        # Customer codes in first-appearance order (missing IDs are code -1 and dropped)
+        customer_codes, customer_ids = pd.factorize(transaction_data['nameOrig'], sort=False)
+        agg = _customer_aggregates(
+            customer_codes,
+            len(customer_ids),
+            transaction_data['amount'].to_numpy(dtype=float),
+            transaction_data['isFraud'].to_numpy() if has_fraud else np.zeros(n_tx),
+            (tx_type == 'CASH_OUT').to_numpy() if has_type else np.zeros(n_tx),
+            self._type_scores(tx_type) if has_type else np.zeros(n_tx)
+        )
+        
+        tx_count = agg['tx_count']
+        max_amount = agg['max_amount']
+        avg_amount = agg['total_amount'] / tx_count
+        fraud_count = agg['fraud_count']
+        
+        # Transaction type: mean per-transaction type score
+        tx_type_score = np.minimum(agg['type_score_sum'] / tx_count, 100)
+        
+        # Amount, fraud history and cash pattern risk
+        amount_score = _amount_score_vec(
+            max_amount, avg_amount, self.thresholds['high_amount'], self.thresholds['medium_amount']
+        )
+        fraud_score = _fraud_score_vec(fraud_count, tx_count) if has_fraud else np.zeros(len(customer_ids))
+        cash_out_rate = agg['cash_out_count'] / tx_count
+        cash_score = _cash_score_vec(cash_out_rate) if has_type else np.zeros(len(customer_ids))
+        
+        # Calculate weighted total score
+        total_score = (
+            tx_type_score * self.weights['transaction_type'] +
+            amount_score * self.weights['amount_risk'] +
+            fraud_score * self.weights['fraud_history'] +
+            cash_score * self.weights['cash_pattern']
+        )
+        
+        components = [
+            {
+                'transaction_type': round(tx_type, 2),
+                'amount_risk': round(amount, 2),
+                'fraud_history': round(fraud, 2),
+                'cash_pattern': round(cash, 2)
+            }
+            for tx_type, amount, fraud, cash in zip(
+                tx_type_score.tolist(), amount_score.tolist(), fraud_score.tolist(), cash_score.tolist()
+            )
+        ]
+        
+        return pd.DataFrame({
+            'customer_id': np.asarray(customer_ids),
+            'risk_score': np.round(total_score, 2),
+            'risk_category': pd.Categorical.from_codes(
+                np.digitize(total_score, self._category_edges), categories=self.risk_categories, ordered=True
+            ),
+            'tx_count': tx_count,
+            'total_amount': agg['total_amount'],
+            'fraud_count': fraud_count,
+            'components': components
+        })
 
 def test_risk_engine():
     """Test the risk scoring engine with PaySim data"""
     print("=== TESTING RISK SCORING ENGINE ===")
     
+    from src.utils import category_counts, top_n
+    
     # Load PaySim data
     df = pd.read_csv('data/raw/paysim_transactions.csv', nrows=10000)
     
@@ -189,10 +336,10 @@ def test_risk_engine():
     # Display results
     print(f"\nCustomers scored: {len(risk_scores):,}")
     print("\nRisk category distribution:")
-    print(risk_scores['risk_category'].value_counts())
+    print(category_counts(risk_scores['risk_category']))
     
     print("\nTop 10 highest risk customers:")
-    top_risk = risk_scores.nlargest(10, 'risk_score')
+    top_risk = top_n(risk_scores, 'risk_score')
     print(top_risk[['customer_id', 'risk_score', 'risk_category', 'fraud_count', 'tx_count']])
     
     print("\nRisk score statistics:")
@@ -0,0 +1,4 @@
+# Shared DataFrame helpers
+from .frames import category_counts, top_n
+
+__all__ = ['category_counts', 'top_n']
\ No newline at end of file
@@ -0,0 +1,39 @@
+import pandas as pd
+import numpy as np
+
+def top_n(df, column, n=10):
+    """Return the n rows with the largest values in column, in descending order (nlargest, keep='first')"""
+    values = df[column].to_numpy()
+    n = min(n, len(values))
+    
+    # NaNs rank last, in row order
+    nan_idx = np.flatnonzero(np.isnan(values)) if values.dtype.kind == 'f' else np.empty(0, dtype=np.intp)
+    candidates = np.delete(values, nan_idx) if len(nan_idx) else values
+    k = min(n, len(candidates))
+    if k == 0:
+        return df.iloc[nan_idx[:n]]
+    
+    # O(N) partial selection of the k-th largest value
+    kth = np.partition(candidates, len(candidates) - k)[len(candidates) - k]
+    
+    # Every row above the cutoff, then the earliest rows tied at it
+    above = np.flatnonzero(values > kth)
+    tied = np.flatnonzero(values == kth)[:k - len(above)]
+    top_idx = np.sort(np.concatenate([above, tied]))
+    
+    # Stable descending sort of the selected rows (ties keep row order, no negation)
+    top_values = values[top_idx]
+    order = (len(top_values) - 1 - np.argsort(top_values[::-1], kind='stable'))[::-1]
+    return df.iloc[np.concatenate([top_idx[order], nan_idx[:n - k]])]
+
+def category_counts(values):
+    """Counts of the values present in a Series, most common first"""
+    if not isinstance(values.dtype, pd.CategoricalDtype):
+        return values.value_counts()
+    
+    # Categorical input: bincount over the codes, dropping unused categories
+    codes = values.cat.codes.to_numpy()
+    counts = np.bincount(codes[codes >= 0], minlength=len(values.cat.categories))
+    order = np.argsort(-counts, kind='stable')
+    order = order[counts[order] > 0]
+    return pd.Series(counts[order], index=pd.Index(values.cat.categories[order], name=values.name), name='count')
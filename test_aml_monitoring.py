@@ -4,8 +4,10 @@ Demonstrates Phase 3: Alert generation and case management
 """
 
 import pandas as pd
-from src.monitoring.alert_engine import AMLAlertEngine, AlertMonitor
-from src.monitoring.case_manager import AMLCaseManager
+from src.monitoring.alert_engine import AMLAlertEngine, AlertMonitor, save_alerts, ALERTS_PATH
+from src.monitoring.case_manager import AMLCaseManager, CASES_PATH, CASE_ACTIONS_PATH
+from src.features.customer_profiler import ENHANCED_PROFILES_PATH
+from src.utils import category_counts
 
 def test_complete_aml_workflow():
     """Test complete AML monitoring workflow"""
@@ -13,7 +15,7 @@ def test_complete_aml_workflow():
     
     # Load customer profiles
     try:
-        profiles = pd.read_csv('data/processed/enhanced_customer_profiles.csv')
+        profiles = pd.read_parquet(ENHANCED_PROFILES_PATH)
         print(f"Loaded {len(profiles)} customer profiles")
     except FileNotFoundError:
         print("Enhanced customer profiles not found. Run test_customer_profiler.py first.")
@@ -43,11 +45,7 @@ def test_complete_aml_workflow():
         
         # Create cases for high priority alerts
         high_priority_alerts = monitor.get_high_priority_alerts()
-        case_count = 0
-        
-        for _, alert in high_priority_alerts.iterrows():
-            case_id = case_manager.create_case_from_alert(alert)
-            case_count += 1
+        case_count = len(case_manager.bulk_create_from_alerts(high_priority_alerts))
         
         print(f"   Created {case_count} investigation cases")
         
@@ -58,9 +56,7 @@ def test_complete_aml_workflow():
             cases = case_manager.get_high_priority_cases()
             
             # Simulate case processing
-            for i, (_, case) in enumerate(cases.head(3).iterrows()):
-                case_id = case['case_id']
-                
+            for i, case_id in enumerate(cases['case_id'].head(3)):
                 if i == 0:
                     case_manager.update_case_status(case_id, "IN_PROGRESS", "Investigation initiated")
                     case_manager.add_case_notes(case_id, "Customer documentation requested", "AML_Analyst_1")
@@ -104,16 +100,16 @@ def test_complete_aml_workflow():
         # Step 6: Save Results
         print("\n6. SAVING MONITORING DATA...")
         
-        alerts.to_csv('data/processed/aml_alerts.csv', index=False)
-        print("   Alerts saved to: data/processed/aml_alerts.csv")
+        save_alerts(alerts, ALERTS_PATH)
+        print(f"   Alerts saved to: {ALERTS_PATH}")
         
         if len(case_manager.cases) > 0:
-            case_manager.cases.to_csv('data/processed/aml_cases.csv', index=False)
-            print("   Cases saved to: data/processed/aml_cases.csv")
+            case_manager.cases.to_parquet(CASES_PATH, index=False)
+            print(f"   Cases saved to: {CASES_PATH}")
         
         if len(case_manager.case_actions) > 0:
-            case_manager.case_actions.to_csv('data/processed/case_actions.csv', index=False)
-            print("   Case actions saved to: data/processed/case_actions.csv")
+            case_manager.case_actions.to_parquet(CASE_ACTIONS_PATH, index=False)
+            print(f"   Case actions saved to: {CASE_ACTIONS_PATH}")
         
         # Step 7: Regulatory Reporting Summary
         print("\n7. REGULATORY REPORTING READY:")
@@ -133,8 +129,8 @@ def test_complete_aml_workflow():
 def display_monitoring_metrics():
     """Display key monitoring metrics"""
     try:
-        alerts = pd.read_csv('data/processed/aml_alerts.csv')
-        cases = pd.read_csv('data/processed/aml_cases.csv')
+        alerts = pd.read_parquet(ALERTS_PATH)
+        cases = pd.read_parquet(CASES_PATH)
         
         print("\n=== AML MONITORING METRICS ===")
         
@@ -149,7 +145,7 @@ def display_monitoring_metrics():
         print(f"  Closed Cases: {len(cases[cases['status'] == 'CLOSED'])}")
         
         print(f"\nTop Alert Types:")
-        print(alerts['alert_type'].value_counts().head())
+        print(category_counts(alerts['alert_type']).head())
         
     except FileNotFoundError:
         print("Monitoring data not found. Run the workflow test first.")
@@ -1,158 +1,200 @@
 import pandas as pd
 import numpy as np
+from src.utils import category_counts, top_n
+from src.features.customer_profiler import (
+    ENHANCED_PROFILES_PATH, FLAG_HIGH_RISK_JURISDICTION, FLAG_SANCTIONS, FLAG_FATF,
+    RISK_CATEGORY_EDGES, RISK_CATEGORY_LABELS
+)
+
+# Enhanced risk weights (fixed schema, shared by every scoring call)
+ENHANCED_RISK_WEIGHTS = {
+    'country_risk': 0.30,
+    'pep_risk': 0.40,
+    'demographic_risk': 0.20,
+    'geographic_risk': 0.10
+}
+
+# Age risk buckets: <18, 18-25, 26-40, 41-60, 61+ (ages outside 18-60 are medium risk)
+_AGE_EDGES = np.array([18, 26, 41, 61])
+_AGE_SCORES = np.array([25, 30, 15, 10, 25], dtype=np.int16)
+
+# Country risk ratings (based on Basel AML Index), stored column-wise by country index
+_COUNTRIES = np.array(['US', 'UK', 'DE', 'FR', 'SG', 'CH', 'RU', 'CN', 'IN', 'BR', 'NG', 'AF', 'IR', 'KP'])
+_COUNTRY_RISK_SCORES = np.array([15, 20, 18, 22, 25, 12, 75, 45, 40, 50, 80, 95, 90, 100], dtype=np.int16)
+
+# Nationality sampling weights (inverse to country risk)
+_COUNTRY_WEIGHTS = 1.0 / _COUNTRY_RISK_SCORES
+_COUNTRY_WEIGHTS /= _COUNTRY_WEIGHTS.sum()
+
+# High-risk occupations for PEP classification, then standard occupations
+HIGH_RISK_OCCUPATIONS = [
+    'Government Official', 'Military Officer', 'Judge', 'Diplomat',
+    'Central Bank Official', 'State Enterprise Executive', 'Political Party Official'
+]
+STANDARD_OCCUPATIONS = [
+    'Software Engineer', 'Teacher', 'Doctor', 'Lawyer', 'Accountant',
+    'Manager', 'Sales Representative', 'Consultant', 'Analyst', 'Engineer'
+]
+
+# Category values in categorical code order
+OCCUPATIONS = HIGH_RISK_OCCUPATIONS + STANDARD_OCCUPATIONS
+PEP_CATEGORIES = ['NOT_PEP', 'DOMESTIC_PEP', 'FOREIGN_PEP']
+KYC_STATUSES = ['COMPLETE', 'PENDING', 'INCOMPLETE']
+
+def _country_flag_table():
+    """Per-country flag bits; the trailing 0 entry catches unknown codes (-1)"""
+    flags = np.zeros(len(_COUNTRIES) + 1, dtype=np.uint8)
+    for flag, flagged in ((FLAG_HIGH_RISK_JURISDICTION, ['AF', 'IR', 'KP', 'RU']),
+                          (FLAG_SANCTIONS, ['IR', 'KP', 'RU']),
+                          (FLAG_FATF, ['AF', 'IR', 'KP'])):
+        flags[np.flatnonzero(np.isin(_COUNTRIES, flagged))] |= flag
+    return flags
+
+_COUNTRY_FLAGS = _country_flag_table()
+
+# Geographic risk score for each of the 8 flag-bit combinations
+_GEO_FLAG_BITS = np.arange(8, dtype=np.uint8)
+_GEO_FLAG_SCORES = (
+    ((_GEO_FLAG_BITS & FLAG_HIGH_RISK_JURISDICTION) != 0) * 40 +
+    ((_GEO_FLAG_BITS & FLAG_SANCTIONS) != 0) * 60 +
+    ((_GEO_FLAG_BITS & FLAG_FATF) != 0) * 80
+).astype(np.int16)
+
+def _fused_risk_scores(country_risk, pep_risk, age_risk, kyc_incomplete, new_account, geo_flags, weights):
+    """
+    Demographic-only variant of the src profiler's scoring kernel
+    Takes the packed geo_flags column and has no transaction risk term
+    """
+    # Boolean indicators are viewed as int8 0/1 and scaled by small-integer penalties
+    demographic = age_risk + kyc_incomplete.view(np.int8) * np.int8(30) + new_account.view(np.int8) * np.int8(20)
+    demographic = demographic.astype(np.int16, copy=False)
+    geographic = _GEO_FLAG_SCORES[geo_flags]
+    
+    score = country_risk * weights['country_risk']
+    score += pep_risk * weights['pep_risk']
+    score += demographic * weights['demographic_risk']
+    score += geographic * weights['geographic_risk']
+    score = np.round(score, 2)
+    
+    category_code = np.searchsorted(RISK_CATEGORY_EDGES, score, side='right')
+    
+    return demographic, geographic, score, category_code
+
+def _unpack_geo_flags(profiles_df):
+    """Replace geo_flags with the bool flag columns of the shared enhanced profile schema"""
+    flags = profiles_df['geo_flags'].to_numpy()
+    return profiles_df.assign(
+        high_risk_jurisdiction=(flags & FLAG_HIGH_RISK_JURISDICTION) != 0,
+        sanctions_risk=(flags & FLAG_SANCTIONS) != 0,
+        fatf_risk=(flags & FLAG_FATF) != 0
+    ).drop(columns='geo_flags')
 
 class CustomerProfileGenerator:
     """Generate synthetic customer profiles with AML/KYC risk factors"""
     
-    def __init__(self):
-        # Country risk ratings (based on Basel AML Index)
-        self.country_risk = {
-            'US': {'risk_score': 15, 'category': 'LOW'},
-            'UK': {'risk_score': 20, 'category': 'LOW'},
-            'DE': {'risk_score': 18, 'category': 'LOW'},
-            'FR': {'risk_score': 22, 'category': 'LOW'},
-            'SG': {'risk_score': 25, 'category': 'LOW'},
-            'CH': {'risk_score': 12, 'category': 'LOW'},
-            'RU': {'risk_score': 75, 'category': 'HIGH'},
-            'CN': {'risk_score': 45, 'category': 'MEDIUM'},
-            'IN': {'risk_score': 40, 'category': 'MEDIUM'},
-            'BR': {'risk_score': 50, 'category': 'MEDIUM'},
-            'NG': {'risk_score': 80, 'category': 'HIGH'},
-            'AF': {'risk_score': 95, 'category': 'CRITICAL'},
-            'IR': {'risk_score': 90, 'category': 'CRITICAL'},
-            'KP': {'risk_score': 100, 'category': 'CRITICAL'}
-        }
-        
-        # High-risk occupations for PEP classification
-        self.high_risk_occupations = [
-            'Government Official', 'Military Officer', 'Judge', 'Diplomat',
-            'Central Bank Official', 'State Enterprise Executive', 'Political Party Official'
-        ]
-        
-        # Standard occupations
-        self.standard_occupations = [
-            'Software Engineer', 'Teacher', 'Doctor', 'Lawyer', 'Accountant',
-            'Manager', 'Sales Representative', 'Consultant', 'Analyst', 'Engineer'
-        ]
+    def __init__(self, seed=None):
+        # Random generator for synthetic profiles (seed for reproducible runs)
+        self._rng = np.random.default_rng(seed)
     
     def generate_customer_demographics(self, customer_ids):
         """Generate demographic profiles for customers"""
         print(f"Generating demographic profiles for {len(customer_ids):,} customers...")
         
-        profiles = []
-        countries = list(self.country_risk.keys())
-        country_weights = [1/risk['risk_score'] for risk in self.country_risk.values()]
+        n = len(customer_ids)
+        rng = self._rng
+        
+        # Generate basic demographics (one draw per column for all customers)
+        ages = rng.integers(18, 81, n, dtype=np.int16)
+        nat_idx = rng.choice(len(_COUNTRIES), size=n, p=_COUNTRY_WEIGHTS)
+        
+        # Determine PEP status (2% chance); categorical columns are drawn as integer codes
+        is_pep = rng.random(n) < 0.02
+        n_high_risk = len(HIGH_RISK_OCCUPATIONS)
+        occupation_code = np.where(
+            is_pep,
+            rng.integers(0, n_high_risk, n),
+            n_high_risk + rng.integers(0, len(STANDARD_OCCUPATIONS), n)
+        )
+        pep_category_code = np.where(is_pep, np.where(rng.random(n) < 0.7, 1, 2), 0)
+        
+        # Account information
+        account_age_days = rng.integers(30, 3650, n, dtype=np.int16)
+        kyc_status_code = rng.choice(3, n, p=[0.85, 0.10, 0.05])
         
-        for customer_id in customer_ids:
-            # Generate basic demographics
-            age = np.random.randint(18, 81)
-            nationality = np.random.choice(countries, p=np.array(country_weights)/sum(country_weights))
-            
-            # Determine PEP status (2% chance)
-            is_pep = np.random.random() < 0.02
-            if is_pep:
-                occupation = np.random.choice(self.high_risk_occupations)
-                pep_category = 'DOMESTIC_PEP' if np.random.random() < 0.7 else 'FOREIGN_PEP'
-            else:
-                occupation = np.random.choice(self.standard_occupations)
-                pep_category = 'NOT_PEP'
-            
-            # Account information
-            account_age_days = np.random.randint(30, 3650)
-            kyc_status = np.random.choice(['COMPLETE', 'PENDING', 'INCOMPLETE'], p=[0.85, 0.10, 0.05])
-            
-            # Risk factors
-            country_risk_score = self.country_risk[nationality]['risk_score']
-            age_risk_score = self._get_age_risk_score(age)
-            pep_risk_score = 80 if is_pep else 0
-            
-            profiles.append({
-                'customer_id': customer_id,
-                'age': age,
-                'nationality': nationality,
-                'occupation': occupation,
-                'is_pep': is_pep,
-                'pep_category': pep_category,
-                'account_age_days': account_age_days,
-                'kyc_status': kyc_status,
-                'country_risk_score': country_risk_score,
-                'age_risk_score': age_risk_score,
-                'pep_risk_score': pep_risk_score
-            })
+        # Risk factors
+        country_risk_score = _COUNTRY_RISK_SCORES[nat_idx]
+        age_risk_score = self._get_age_risk_scores(ages)
+        pep_risk_score = np.where(is_pep, 80, 0).astype(np.int16)
         
-        return pd.DataFrame(profiles)
+        return pd.DataFrame({
+            'customer_id': customer_ids,
+            'age': ages,
+            'nationality': pd.Categorical.from_codes(nat_idx, categories=_COUNTRIES),
+            'occupation': pd.Categorical.from_codes(
+                occupation_code, categories=OCCUPATIONS
+            ),
+            'is_pep': is_pep,
+            'pep_category': pd.Categorical.from_codes(pep_category_code, categories=PEP_CATEGORIES),
+            'account_age_days': account_age_days,
+            'kyc_status': pd.Categorical.from_codes(kyc_status_code, categories=KYC_STATUSES),
+            'country_risk_score': country_risk_score,
+            'age_risk_score': age_risk_score,
+            'pep_risk_score': pep_risk_score
+        }, copy=False)
     
     def _get_age_risk_score(self, age):
         """Calculate risk score based on age"""
-        if 18 <= age <= 25:
-            return 30  # Young adults - higher risk
-        elif 26 <= age <= 40:
-            return 15  # Working age - lower risk
-        elif 41 <= age <= 60:
-            return 10  # Established - lowest risk
-        else:
-            return 25  # Elderly - medium risk
+        return int(self._get_age_risk_scores(np.array([age]))[0])
+    
+    def _get_age_risk_scores(self, ages):
+        """Calculate risk scores for an array of ages via bucket lookup"""
+        return _AGE_SCORES[np.searchsorted(_AGE_EDGES, ages, side='right')]
     
     def enhance_with_geographic_risk(self, profiles_df):
         """Add geographic risk indicators"""
         print("Adding geographic risk indicators...")
         
-        # High-risk jurisdiction flags
-        profiles_df['high_risk_jurisdiction'] = profiles_df['nationality'].isin(['AF', 'IR', 'KP', 'RU'])
-        profiles_df['sanctions_risk'] = profiles_df['nationality'].isin(['IR', 'KP', 'RU'])
-        profiles_df['fatf_risk'] = profiles_df['nationality'].isin(['AF', 'IR', 'KP'])
+        # One flag lookup per customer by country code
+        country_codes = pd.Categorical(profiles_df['nationality'], categories=_COUNTRIES).codes
+        flags = _COUNTRY_FLAGS[country_codes]
         
-        return profiles_df
+        # High-risk jurisdiction, sanctions and FATF flags bit-packed into one uint8 column
+        return profiles_df.assign(geo_flags=flags)
     
     def generate_enhanced_risk_scores(self, profiles_df):
         """Calculate enhanced risk scores"""
         print("Calculating enhanced risk scores...")
         
-        # Enhanced risk weights
-        weights = {
-            'country_risk': 0.30,
-            'pep_risk': 0.40,
-            'demographic_risk': 0.20,
-            'geographic_risk': 0.10
-        }
+        # KYC status as categorical codes (a no-op recode when already categorical)
+        kyc_codes = pd.Categorical(profiles_df['kyc_status'], categories=KYC_STATUSES).codes
         
-        # Calculate risk components
-        profiles_df['demographic_risk_score'] = (
-            profiles_df['age_risk_score'] + 
-            (profiles_df['kyc_status'] == 'INCOMPLETE').astype(int) * 30 +
-            (profiles_df['account_age_days'] < 90).astype(int) * 20
+        # Fused scoring pass over the raw input columns
+        demographic, geographic, score, category_code = _fused_risk_scores(
+            profiles_df['country_risk_score'].to_numpy(),
+            profiles_df['pep_risk_score'].to_numpy(),
+            profiles_df['age_risk_score'].to_numpy(),
+            kyc_codes == KYC_STATUSES.index('INCOMPLETE'),
+            profiles_df['account_age_days'].to_numpy() < 90,  # New accounts
+            profiles_df['geo_flags'].to_numpy(),
+            ENHANCED_RISK_WEIGHTS
         )
         
-        profiles_df['geographic_risk_score'] = (
-            profiles_df['high_risk_jurisdiction'].astype(int) * 40 +
-            profiles_df['sanctions_risk'].astype(int) * 60 +
-            profiles_df['fatf_risk'].astype(int) * 80
+        # Score columns and enhanced risk categories, added in one assign
+        return profiles_df.assign(
+            demographic_risk_score=demographic,
+            geographic_risk_score=geographic,
+            enhanced_risk_score=score.astype(np.float32),
+            enhanced_risk_category=pd.Categorical.from_codes(
+                category_code, categories=RISK_CATEGORY_LABELS, ordered=True
+            )
         )
-        
-        # Calculate final enhanced risk score
-        profiles_df['enhanced_risk_score'] = (
-            profiles_df['country_risk_score'] * weights['country_risk'] +
-            profiles_df['pep_risk_score'] * weights['pep_risk'] +
-            profiles_df['demographic_risk_score'] * weights['demographic_risk'] +
-            profiles_df['geographic_risk_score'] * weights['geographic_risk']
-        ).round(2)
-        
-        # Enhanced risk categories
-        profiles_df['enhanced_risk_category'] = profiles_df['enhanced_risk_score'].apply(
-            lambda x: 'CRITICAL' if x >= 85 else 
-                     'HIGH' if x >= 60 else 
-                     'MEDIUM' if x >= 30 else 'LOW'
-        )
-        
-        return profiles_df
 
 def test_customer_profiler():
     """Test the customer profile generator"""
     print("=== TESTING CUSTOMER PROFILE GENERATOR ===")
     
-    # Load PaySim data to get customer IDs
-    df = pd.read_csv('data/raw/paysim_transactions.csv', nrows=5000)
-    customer_ids = df['nameOrig'].unique()[:1000]  # Test with 1000 customers
+    # Synthesize PaySim-style customer IDs (profiles do not join back to transactions)
+    customer_ids = np.char.add('C', np.arange(1000).astype(str))  # Test with 1000 customers
     
     # Generate customer profiles
     profiler = CustomerProfileGenerator()
@@ -170,36 +212,36 @@ def test_customer_profiler():
     print(f"\nCustomer profiles generated: {len(enhanced_scores):,}")
     
     print("\nEnhanced risk category distribution:")
-    print(enhanced_scores['enhanced_risk_category'].value_counts())
+    print(category_counts(enhanced_scores['enhanced_risk_category']))
     
     print("\nPEP distribution:")
-    print(enhanced_scores['pep_category'].value_counts())
+    print(category_counts(enhanced_scores['pep_category']))
     
     print("\nCountry distribution (top 10):")
-    print(enhanced_scores['nationality'].value_counts().head(10))
+    print(category_counts(enhanced_scores['nationality']).head(10))
     
     print("\nTop 10 highest enhanced risk customers:")
-    top_enhanced = enhanced_scores.nlargest(10, 'enhanced_risk_score')
+    top_enhanced = top_n(enhanced_scores, 'enhanced_risk_score')
     print(top_enhanced[['customer_id', 'enhanced_risk_score', 'enhanced_risk_category', 
                       'is_pep', 'nationality', 'age', 'occupation']])
     
     print("\nHigh-risk jurisdiction analysis:")
-    high_risk_customers = enhanced_scores[enhanced_scores['high_risk_jurisdiction']]
+    high_risk_customers = enhanced_scores[(enhanced_scores['geo_flags'] & FLAG_HIGH_RISK_JURISDICTION) != 0]
     print(f"Customers from high-risk jurisdictions: {len(high_risk_customers)}")
     if len(high_risk_customers) > 0:
         print("High-risk jurisdictions found:")
-        print(high_risk_customers['nationality'].value_counts())
+        print(category_counts(high_risk_customers['nationality']))
     
     print("\nPEP analysis:")
     pep_customers = enhanced_scores[enhanced_scores['is_pep']]
     print(f"PEP customers identified: {len(pep_customers)}")
     if len(pep_customers) > 0:
         print("PEP occupations:")
-        print(pep_customers['occupation'].value_counts())
+        print(category_counts(pep_customers['occupation']))
     
-    # Save enhanced profiles
-    enhanced_scores.to_csv('data/processed/enhanced_customer_profiles.csv', index=False)
-    print("\nEnhanced customer profiles saved to: data/processed/enhanced_customer_profiles.csv")
+    # Save enhanced profiles (flags unpacked to the columns the alert engine reads)
+    _unpack_geo_flags(enhanced_scores).to_parquet(ENHANCED_PROFILES_PATH, compression='zstd', index=False)
+    print(f"\nEnhanced customer profiles saved to: {ENHANCED_PROFILES_PATH}")
     
     return enhanced_scores
 